@@ -1,8 +1,10 @@
+import os
 import streamlit as st
 import pandas as pd
 import sqlite3
 import plotly.express as px
 from datetime import datetime
+from pathlib import Path
 import io
 
 # Set page configuration
@@ -13,110 +15,242 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Minimalist CSS styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #2c3e50;
-        text-align: center;
-        margin-bottom: 1rem;
-        font-weight: 300;
-        letter-spacing: -0.5px;
-    }
-    .section-header {
-        font-size: 1.2rem;
-        color: #2c3e50;
-        margin: 1.5rem 0 0.5rem 0;
-        font-weight: 400;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    .city-card {
-        background-color: #ffffff;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #3498db;
-        margin-bottom: 1rem;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .metric-card {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 8px;
-        text-align: center;
-        margin: 0.5rem;
-    }
-    .temperature-value {
-        font-size: 1.5rem;
-        font-weight: bold;
-        color: #2c3e50;
-    }
-    .weather-description {
-        font-size: 0.9rem;
-        color: #7f8c8d;
-        text-transform: capitalize;
-    }
-    .download-button {
-        background-color: #3498db;
-        color: white;
-        padding: 0.5rem 1rem;
-        border-radius: 4px;
-        border: none;
-        cursor: pointer;
-        font-size: 0.9rem;
-        margin-top: 1rem;
-    }
-    .download-button:hover {
-        background-color: #2980b9;
-    }
-    .dataset-table {
-        font-size: 0.9rem;
-        margin-top: 1rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Minimalist CSS styling, read from disk once and cached
+@st.cache_data
+def _load_css():
+    return f"<style>{Path('styles.css').read_text()}</style>"
 
 
-class WeatherDashboard:
-    def __init__(self):
-        self.df = self.load_data()
-        self.cities_order = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata",
-                             "Hyderabad", "Jaipur", "Pune", "Ghaziabad"]
-
-    def load_data(self):
-        """Load weather data from SQLite database"""
-        try:
-            with sqlite3.connect("weather_data.db") as conn:
-                df = pd.read_sql_query("SELECT * FROM weather_log", conn)
-            df['timestamp_utc'] = pd.to_datetime(df['timestamp_utc'])
-            df['load_timestamp_utc'] = pd.to_datetime(df['load_timestamp_utc'])
-            return df
-        except:
-            return pd.DataFrame()
-
-    def get_latest_data(self):
-        """Compute latest weather data per city"""
-        if self.df.empty:
-            return pd.DataFrame()
+st.markdown(_load_css(), unsafe_allow_html=True)
+
+
+DB_FILE = "weather_data.db"
+
+CITIES_ORDER = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata",
+                "Hyderabad", "Jaipur", "Pune", "Ghaziabad"]
+
+# Rows of the dataset table sent to the browser per page
+DATASET_PAGE_SIZE = 500
+
 
-        latest_data = (
-            self.df.sort_values('load_timestamp_utc')
-            .groupby('city')
-            .last()
-            .reset_index()
+# Columns needed by the metrics, chart and city cards; the remaining
+# columns are only pulled for the dataset section and the CSV export
+SUMMARY_COLUMNS = ['city', 'temperature_celsius', 'feels_like_celsius',
+                   'humidity_percent', 'wind_speed_mps', 'weather_description',
+                   'weather_main', 'latitude', 'longitude', 'timestamp_utc',
+                   'load_timestamp_utc']
+
+
+@st.cache_resource
+def get_conn():
+    """One read-only SQLite connection per process, reused by every loader.
+
+    mmap_size lets SQLite fault pages in via mmap instead of read
+    syscalls, which pays off on repeat queries over the same pages.
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def _read_weather_log(select_cols):
+    """Chunk-read weather_log with shrunk dtypes; select_cols may be '*'"""
+    if not os.path.exists(DB_FILE):
+        # No ETL run yet: skip the doomed connect and cache the empty frame
+        return pd.DataFrame()
+    try:
+        # Stream the table in chunks so peak memory stays at
+        # O(N + chunksize) instead of several copies of the full table
+        chunks = pd.read_sql_query(
+            f"SELECT {select_cols} FROM weather_log",
+            get_conn(),
+            chunksize=10_000,
+            parse_dates=['timestamp_utc', 'load_timestamp_utc']
         )
-        # Reorder cities
-        latest_data['city'] = pd.Categorical(
-            latest_data['city'],
-            categories=self.cities_order,
-            ordered=True
+        df = pd.concat(chunks, copy=False, ignore_index=True)
+    except (sqlite3.DatabaseError, pd.errors.DatabaseError) as e:
+        st.error(f"Could not read weather data from {DB_FILE}: {e}")
+        return pd.DataFrame()
+
+    # Shrink dtypes: small floats, unsigned ints and categorical strings
+    # halve memory and speed up every downstream groupby/sort/to_csv
+    for col in ['temperature_celsius', 'feels_like_celsius', 'wind_speed_mps',
+                'latitude', 'longitude']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    if 'humidity_percent' in df.columns:
+        df['humidity_percent'] = pd.to_numeric(df['humidity_percent'],
+                                               downcast='unsigned')
+    for col in ['city', 'weather_main', 'weather_description', 'country']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+@st.cache_data(ttl=300)
+def load_summary():
+    """Load only the columns the main dashboard sections use"""
+    return _read_weather_log(', '.join(SUMMARY_COLUMNS))
+
+
+@st.cache_data(ttl=300)
+def load_full():
+    """Load every column; only needed for the dataset table and CSV export"""
+    return _read_weather_log('*')
+
+
+@st.cache_data(ttl=300)
+def load_latest():
+    """Load only the latest record per city, computed inside SQLite"""
+    if not os.path.exists(DB_FILE):
+        return pd.DataFrame()
+    try:
+        df = pd.read_sql_query(
+            """
+            SELECT w.* FROM weather_log w
+            JOIN (SELECT city, MAX(load_timestamp_utc) AS mx
+                  FROM weather_log GROUP BY city) t
+              ON w.city = t.city AND w.load_timestamp_utc = t.mx
+            """,
+            get_conn(),
+            parse_dates=['timestamp_utc', 'load_timestamp_utc']
         )
-        return latest_data.sort_values('city')
-    
-    def convert_df_to_csv(self, df):
-        """Convert DataFrame to CSV for download"""
-        return df.to_csv(index=False).encode('utf-8')
+    except (sqlite3.DatabaseError, pd.errors.DatabaseError) as e:
+        st.error(f"Could not read weather data from {DB_FILE}: {e}")
+        return pd.DataFrame()
+
+    # Reorder cities
+    df['city'] = pd.Categorical(df['city'], categories=CITIES_ORDER, ordered=True)
+    return df.sort_values('city')
+
+
+@st.cache_data(ttl=300)
+def load_metrics_summary():
+    """Load the headline metrics precomputed by the pipeline"""
+    if not os.path.exists(DB_FILE):
+        return pd.DataFrame()
+    try:
+        return pd.read_sql_query("SELECT * FROM weather_summary", get_conn())
+    except (sqlite3.DatabaseError, pd.errors.DatabaseError):
+        # Databases written before the summary table existed
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=300)
+def get_latest_data(df):
+    """Compute latest weather data per city (cached across reruns)"""
+    if df.empty:
+        return pd.DataFrame()
+
+    # Single O(N) pass: one idxmax per city instead of a full sort
+    idx = df.groupby('city', observed=True, sort=False)['load_timestamp_utc'].idxmax()
+    latest_data = df.loc[idx].copy()
+    # Reorder cities
+    latest_data['city'] = pd.Categorical(
+        latest_data['city'],
+        categories=CITIES_ORDER,
+        ordered=True
+    )
+    return latest_data.sort_values('city')
+
+
+@st.cache_resource
+def build_temp_fig(cities, temps, humidities, winds, feels_like):
+    """Build the temperature bar chart once per dataset version.
+
+    Takes plain tuples so the cache key is cheap to hash; the figure is
+    only rebuilt when the underlying values change after an ETL run.
+    """
+    chart_df = pd.DataFrame({
+        'city': cities,
+        'temperature_celsius': temps,
+        'humidity_percent': humidities,
+        'wind_speed_mps': winds,
+        'feels_like_celsius': feels_like
+    })
+
+    fig = px.bar(
+        chart_df,
+        x='city',
+        y='temperature_celsius',
+        color='temperature_celsius',
+        hover_data=['humidity_percent', 'wind_speed_mps', 'feels_like_celsius'],
+        color_continuous_scale='Blues',
+        height=300
+    )
+
+    fig.update_layout(
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=30, b=20),
+        xaxis_title=None,
+        yaxis_title="Temperature (°C)",
+        yaxis_range=[
+            min(20, min(temps) - 2),
+            max(35, max(temps) + 2)
+        ]
+    )
+    return fig
+
+
+def build_city_cards_html(latest_data):
+    """Build every simple city-card's HTML in one vectorized string pass"""
+    city = latest_data['city'].astype(str)
+    temp = latest_data['temperature_celsius'].astype('float64').round(1).astype(str)
+    desc = latest_data['weather_description'].astype(str).str.title()
+    humidity = latest_data['humidity_percent'].astype(str)
+    wind = latest_data['wind_speed_mps'].astype('float64').round(2).astype(str)
+
+    return (
+        '<div class="city-card">'
+        '<div class="card-row">'
+        '<h4 class="card-title">' + city + '</h4>'
+        '<div class="temperature-value temperature-value-sm">' + temp + '°C</div>'
+        '</div>'
+        '<p class="weather-description" style="margin: 0.3rem 0;">' + desc + '</p>'
+        '<div class="card-stats">'
+        '<span>💧 ' + humidity + '%</span>'
+        '<span>💨 ' + wind + ' m/s</span>'
+        '</div>'
+        '</div>'
+    )
+
+
+@st.cache_data(ttl=300)
+def dataset_view(dataset_version):
+    """Pre-sorted table view and date span, computed once per dataset version.
+
+    dataset_version is the newest load_timestamp_utc; it only changes when
+    the ETL runs, so the sort and the min/max scans happen once, not per
+    rerun.
+    """
+    df = load_full()
+    view = (
+        df[['city', 'temperature_celsius', 'feels_like_celsius',
+            'humidity_percent', 'wind_speed_mps', 'weather_description',
+            'timestamp_utc']]
+        .sort_values('timestamp_utc', ascending=False)
+        .reset_index(drop=True)
+    )
+    date_span = (df['timestamp_utc'].min().strftime('%Y-%m-%d'),
+                 df['timestamp_utc'].max().strftime('%Y-%m-%d'))
+    return view, date_span
+
+
+@st.cache_data(hash_funcs={
+    pd.DataFrame: lambda d: (len(d), d['load_timestamp_utc'].max())
+})
+def convert_df_to_csv(df):
+    """Convert DataFrame to CSV for download (re-encoded only when data changes)"""
+    return df.to_csv(index=False).encode('utf-8')
+
+
+class WeatherDashboard:
+    def __init__(self):
+        self.df = load_summary()
+        self.cities_order = CITIES_ORDER
 
     def display_header(self):
         """Display the main header"""
@@ -167,34 +301,20 @@ class WeatherDashboard:
             </div>
             """, unsafe_allow_html=True)
 
+    @st.fragment
     def display_temperature_chart(self, latest_data):
-        """Bar chart of temperatures"""
+        """Bar chart of temperatures (fragment: reruns don't redraw the page)"""
         st.markdown('<div class="section-header">Temperature Overview</div>', unsafe_allow_html=True)
 
         if latest_data.empty:
             return
 
-        fig = px.bar(
-            latest_data,
-            x='city',
-            y='temperature_celsius',
-            color='temperature_celsius',
-            hover_data=['humidity_percent', 'wind_speed_mps', 'feels_like_celsius'],
-            color_continuous_scale='Blues',
-            height=300
-        )
-
-        fig.update_layout(
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(l=20, r=20, t=30, b=20),
-            xaxis_title=None,
-            yaxis_title="Temperature (°C)",
-            yaxis_range=[
-                min(20, latest_data['temperature_celsius'].min() - 2),
-                max(35, latest_data['temperature_celsius'].max() + 2)
-            ]
+        fig = build_temp_fig(
+            tuple(latest_data['city'].astype(str)),
+            tuple(latest_data['temperature_celsius']),
+            tuple(latest_data['humidity_percent']),
+            tuple(latest_data['wind_speed_mps']),
+            tuple(latest_data['feels_like_celsius'])
         )
 
         st.plotly_chart(fig, use_container_width=True)
@@ -204,59 +324,59 @@ class WeatherDashboard:
         if latest_data.empty:
             return
 
-        col1, col2, col3, col4 = st.columns(4)
-
-        metrics = [
-            ("🌡️ Avg Temp", f"{latest_data['temperature_celsius'].mean():.1f}°C"),
-            ("💧 Avg Humidity", f"{latest_data['humidity_percent'].mean():.0f}%"),
-            ("💨 Avg Wind", f"{latest_data['wind_speed_mps'].mean():.1f} m/s"),
-            ("🏙️ Cities", str(len(latest_data)))
-        ]
+        summary = load_metrics_summary()
+        if not summary.empty:
+            # Aggregates were materialized at ETL time; just format them
+            row = summary.iloc[0]
+            metrics = [
+                ("🌡️ Avg Temp", f"{row['avg_temp']:.1f}°C"),
+                ("💧 Avg Humidity", f"{row['avg_humidity']:.0f}%"),
+                ("💨 Avg Wind", f"{row['avg_wind']:.1f} m/s"),
+                ("🏙️ Cities", str(int(row['city_count'])))
+            ]
+        else:
+            metrics = [
+                ("🌡️ Avg Temp", f"{latest_data['temperature_celsius'].mean():.1f}°C"),
+                ("💧 Avg Humidity", f"{latest_data['humidity_percent'].mean():.0f}%"),
+                ("💨 Avg Wind", f"{latest_data['wind_speed_mps'].mean():.1f} m/s"),
+                ("🏙️ Cities", str(len(latest_data)))
+            ]
 
-        for col, (label, value) in zip([col1, col2, col3, col4], metrics):
-            with col:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div style='font-size: 0.9rem; color: #7f8c8d;'>{label}</div>
-                    <div style='font-size: 1.5rem; font-weight: bold; color: #2c3e50;'>{value}</div>
-                </div>
-                """, unsafe_allow_html=True)
+        # One markdown delta for the whole row instead of four columns
+        cards = ''.join(
+            f'<div class="metric-card">'
+            f'<div class="metric-label">{label}</div>'
+            f'<div class="metric-value">{value}</div>'
+            f'</div>'
+            for label, value in metrics
+        )
+        st.markdown(f'<div class="metric-grid">{cards}</div>',
+                    unsafe_allow_html=True)
 
-    def display_city_card_simple(self, city_data):
-        """Simplified city card"""
-        st.markdown(f"""
-        <div class="city-card">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
-                <h4 style="margin: 0; color: #2c3e50;">{city_data['city']}</h4>
-                <div class="temperature-value" style="font-size: 1.2rem;">{city_data['temperature_celsius']:.1f}°C</div>
-            </div>
-            <p class="weather-description" style="margin: 0.3rem 0;">{city_data['weather_description'].title()}</p>
-            <div style="display: flex; justify-content: space-between; font-size: 0.8rem; color: #7f8c8d;">
-                <span>💧 {city_data['humidity_percent']}%</span>
-                <span>💨 {city_data['wind_speed_mps']} m/s</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
+    @st.fragment
     def display_dataset_section(self):
-        """Display dataset and download options"""
+        """Display dataset and download options (fragment: reruns stay local)"""
         st.markdown("---")
         st.markdown('<div class="section-header">Weather Dataset</div>', unsafe_allow_html=True)
         
+        # Pre-sorted view with a subset of columns for better readability,
+        # recomputed only when the ETL adds new data
+        view, (date_from, date_to) = dataset_view(self.df['load_timestamp_utc'].max())
+
         # Show dataset info
         st.markdown(f"""
         <div style="margin-bottom: 1rem; font-size: 0.9rem; color: #7f8c8d;">
-            Dataset contains {len(self.df)} records from {self.df['timestamp_utc'].min().strftime('%Y-%m-%d')} to {self.df['timestamp_utc'].max().strftime('%Y-%m-%d')}
+            Dataset contains {len(view)} records from {date_from} to {date_to}
         </div>
         """, unsafe_allow_html=True)
-        
-        # Display the dataset with a subset of columns for better readability
-        display_cols = ['city', 'temperature_celsius', 'feels_like_celsius', 
-                       'humidity_percent', 'wind_speed_mps', 'weather_description', 
-                       'timestamp_utc']
-        
+
+        # Paginate: the Arrow payload per render is one page, not the full
+        # log, and the page widget only reruns this fragment
+        total_pages = max(1, -(-len(view) // DATASET_PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=total_pages,
+                               value=1, step=1) - 1
         st.dataframe(
-            self.df[display_cols].sort_values('timestamp_utc', ascending=False),
+            view.iloc[page * DATASET_PAGE_SIZE:(page + 1) * DATASET_PAGE_SIZE],
             use_container_width=True,
             height=300
         )
@@ -264,7 +384,7 @@ class WeatherDashboard:
         # Download button
         st.download_button(
             label="Download Full Dataset as CSV",
-            data=self.convert_df_to_csv(self.df),
+            data=convert_df_to_csv(load_full()),
             file_name=f"weather_data_full_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
             mime="text/csv",
             key="full-download"
@@ -275,7 +395,9 @@ class WeatherDashboard:
         if not self.display_header():
             return
 
-        latest_data = self.get_latest_data()  # ✅ compute once
+        latest_data = load_latest()  # ✅ only ~9 rows pulled from SQLite
+        if latest_data.empty:
+            latest_data = get_latest_data(self.df)
 
         # Metrics
         self.display_metrics(latest_data)
@@ -288,10 +410,11 @@ class WeatherDashboard:
         # City grid
         st.markdown('<div class="section-header">All Cities</div>', unsafe_allow_html=True)
         if not latest_data.empty:
-            cols = st.columns(min(len(latest_data), 3))
-            for idx, (_, row) in enumerate(latest_data.iterrows()):
-                with cols[idx % 3]:
-                    self.display_city_card_simple(row)
+            # Single markdown delta; the CSS grid replicates the old
+            # three-column st.columns layout
+            cards_html = build_city_cards_html(latest_data)
+            st.markdown('<div class="city-grid">' + ''.join(cards_html) + '</div>',
+                        unsafe_allow_html=True)
         
         # Dataset section
         self.display_dataset_section()
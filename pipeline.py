@@ -1,8 +1,12 @@
 import os
 import requests
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
 import sqlite3
 
 
@@ -22,9 +26,9 @@ CITIES_DATA = [
 ]
 
 DB_FILE = "weather_data.db"
-CSV_FILE = "weather_data.csv"
+PARQUET_DIR = "weather_data.parquet"
 
-def fetch_weather_data_by_id(city_id, api_key):
+def fetch_weather_data_by_id(city_id, api_key, session):
     base_url = "http://api.openweathermap.org/data/2.5/weather"
     params = {
         "id": city_id,
@@ -32,7 +36,7 @@ def fetch_weather_data_by_id(city_id, api_key):
         "units": "metric"
     }
     try:
-        response = requests.get(base_url, params=params)
+        response = session.get(base_url, params=params)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -42,11 +46,18 @@ def fetch_weather_data_by_id(city_id, api_key):
 print("Starting data extraction for Indian cities using city IDs...")
 all_weather_data = []
 
-for city in CITIES_DATA:
+# One pooled session with keep-alive, all cities fetched concurrently
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+with ThreadPoolExecutor(max_workers=len(CITIES_DATA)) as executor:
+    results = list(executor.map(
+        lambda city: fetch_weather_data_by_id(city['id'], API_KEY, session),
+        CITIES_DATA
+    ))
+
+for city, weather_json in zip(CITIES_DATA, results):
     city_name = city['name']
-    city_id = city['id']
-    
-    weather_json = fetch_weather_data_by_id(city_id, API_KEY)
     if weather_json:
         all_weather_data.append(weather_json)
         print(f"Successfully fetched data for {city_name}.")
@@ -56,44 +67,72 @@ for city in CITIES_DATA:
 
 # TRANSFORM
 print("Transforming data...")
-transformed_data = []
-
-for data in all_weather_data:
-    transformed_entry = {
-        "city": data['name'],
-        "country": data['sys']['country'],
-        "temperature_celsius": data['main']['temp'],
-        "feels_like_celsius": data['main']['feels_like'],
-        "humidity_percent": data['main']['humidity'],
-        "weather_main": data['weather'][0]['main'], 
-        "weather_description": data['weather'][0]['description'], 
-        "timestamp_utc": datetime.fromtimestamp(data['dt'], tz=timezone.utc), 
-        "wind_speed_mps": data['wind']['speed'],
-        "latitude": data['coord']['lat'],
-        "longitude": data['coord']['lon'],
-        "load_timestamp_utc": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-    }
-    transformed_data.append(transformed_entry)
 
-df = pd.DataFrame(transformed_data)
+if all_weather_data:
+    # Flatten the nested JSON in one vectorized pass instead of building
+    # dicts row by row in Python
+    raw = pd.json_normalize(all_weather_data)
+    weather = raw['weather'].str[0].apply(pd.Series)
+
+    df = pd.DataFrame({
+        "city": raw['name'],
+        "country": raw['sys.country'],
+        "temperature_celsius": raw['main.temp'],
+        "feels_like_celsius": raw['main.feels_like'],
+        "humidity_percent": raw['main.humidity'],
+        "weather_main": weather['main'],
+        "weather_description": weather['description'],
+        "timestamp_utc": pd.to_datetime(raw['dt'], unit='s', utc=True),
+        "wind_speed_mps": raw['wind.speed'],
+        "latitude": raw['coord.lat'],
+        "longitude": raw['coord.lon'],
+        "load_timestamp_utc": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    })
+else:
+    df = pd.DataFrame()
 print("Transformation complete. DataFrame created:")
 print(df.head(10))
 
 
 # LOAD
-print(f"Loading data to {CSV_FILE}...")
+# Columnar, compressed and appendable without rewriting history; the
+# dashboard still offers CSV as a download via convert_df_to_csv.
+print(f"Loading data to {PARQUET_DIR}...")
 try:
-    file_exists = os.path.isfile(CSV_FILE)
-    df.to_csv(CSV_FILE, mode='a', header=not file_exists, index=False)
-    print("CSV load complete.")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, root_path=PARQUET_DIR,
+                        partition_cols=["city"], compression="snappy")
+    print("Parquet load complete.")
 except Exception as e:
-    print(f"Error loading to CSV: {e}")
+    print(f"Error loading to Parquet: {e}")
 
 
 print(f"Loading data to SQLite database: {DB_FILE}...")
 try:
     conn = sqlite3.connect(DB_FILE)
-    df.to_sql('weather_log', conn, if_exists='append', index=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    # Single transaction: multi-row INSERTs, one COMMIT, one fsync
+    with conn:
+        df.to_sql('weather_log', conn, if_exists='append', index=False,
+                  method='multi', chunksize=500)
+        # Index so the dashboard's latest-per-city query is an index scan
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_city_load "
+            "ON weather_log(city, load_timestamp_utc DESC)"
+        )
+        # Materialize the dashboard's headline metrics; this run's rows
+        # are the latest per city, so their means are the current ones
+        summary = pd.DataFrame([{
+            'avg_temp': df['temperature_celsius'].mean(),
+            'avg_humidity': df['humidity_percent'].mean(),
+            'avg_wind': df['wind_speed_mps'].mean(),
+            'city_count': df['city'].nunique(),
+            'as_of': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        }])
+        summary.to_sql('weather_summary', conn, if_exists='replace', index=False)
     conn.close()
     print("SQLite load complete.")
 except Exception as e: